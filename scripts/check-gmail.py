@@ -4,18 +4,35 @@ Gmail 새 메일 체크 스크립트
 - IMAP으로 Gmail 읽음
 - 새 메일 있으면 요약 출력
 - credentials: ~/.gmail_credentials (email:app_password)
+- --watch: IMAP 연결 하나를 유지하며 주기적으로 새 메일 확인 (cron 대신)
 """
 
 import imaplib
-import email
+import codecs
+import functools
 from email.header import decode_header
+from email.parser import BytesHeaderParser
 from datetime import datetime, timedelta
 import os
+import re
 import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 CREDENTIALS_PATH = os.path.expanduser("~/.gmail_credentials")
 STATE_PATH = os.path.expanduser("~/Documents/Tolany Vault/memory/gmail-state.json")
 
+# 헤더 3개만 요청 (BODY.PEEK: \Seen 플래그 안 건드림)
+HEADER_FETCH = "(BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE)])"
+FETCH_BATCH_SIZE = 100
+UID_RE = re.compile(rb'UID (\d+)')
+# 헤더만 파싱 (본문/멀티파트 트리 생성 안 함)
+HEADER_PARSER = BytesHeaderParser()
+
 def load_credentials():
     """Load Gmail credentials from file"""
     if not os.path.exists(CREDENTIALS_PATH):
@@ -31,15 +48,28 @@ def load_credentials():
 def load_state():
     """Load last check state"""
     if os.path.exists(STATE_PATH):
-        with open(STATE_PATH, 'r') as f:
-            return json.load(f)
-    return {"last_uid": 0, "last_check": None}
+        with open(STATE_PATH, 'rb') as f:
+            data = f.read()
+        return orjson.loads(data) if orjson else json.loads(data)
+    return {"last_uid": 0, "uidvalidity": None, "last_check": None}
 
 def save_state(state):
     """Save check state"""
     os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
-    with open(STATE_PATH, 'w') as f:
-        json.dump(state, f, indent=2)
+    if orjson:
+        with open(STATE_PATH, 'wb') as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+    else:
+        with open(STATE_PATH, 'w') as f:
+            json.dump(state, f, indent=2)
+
+@functools.lru_cache(maxsize=64)
+def get_decoder(charset):
+    """Resolve charset name to a codec decoder once (declared charset is trusted)"""
+    try:
+        return codecs.lookup(charset or 'utf-8').decode
+    except LookupError:
+        return codecs.lookup('utf-8').decode
 
 def decode_mime_header(header):
     """Decode MIME encoded header"""
@@ -48,12 +78,89 @@ def decode_mime_header(header):
     decoded_parts = decode_header(header)
     result = []
     for part, charset in decoded_parts:
-        if isinstance(part, bytes):
-            result.append(part.decode(charset or 'utf-8', errors='replace'))
-        else:
+        if isinstance(part, str):
             result.append(part)
+            continue
+        result.append(get_decoder(charset)(part, 'replace')[0])
     return ''.join(result)
 
+def search_new_uids(mail, last_uid, since_hours):
+    """Search UIDs newer than last_uid (first run: SINCE since_hours)"""
+    if last_uid:
+        _, data = mail.uid('SEARCH', None, f'UID {last_uid + 1}:*')
+    else:
+        since_date = (datetime.now() - timedelta(hours=since_hours)).strftime("%d-%b-%Y")
+        _, data = mail.uid('SEARCH', None, f'(SINCE "{since_date}")')
+    
+    # 'UID n:*'는 새 메일이 없어도 마지막 UID를 돌려주므로 다시 거름
+    return [uid for uid in data[0].split() if int(uid) > last_uid]
+
+def fetch_headers(mail, uids):
+    """Fetch headers in batches - one round-trip per FETCH_BATCH_SIZE messages"""
+    headers = {}
+    for i in range(0, len(uids), FETCH_BATCH_SIZE):
+        batch = uids[i:i + FETCH_BATCH_SIZE]
+        _, msg_data = mail.uid('FETCH', b','.join(batch), HEADER_FETCH)
+        for item in msg_data:
+            # 응답: (b'12 (UID 345 BODY[HEADER.FIELDS ...] {n}', header_bytes), b')' ...
+            if not isinstance(item, tuple):
+                continue
+            uid_match = UID_RE.search(item[0])
+            if uid_match:
+                headers[uid_match.group(1)] = HEADER_PARSER.parsebytes(item[1])
+    return headers
+
+def connect_gmail(email_addr, app_password, state):
+    """Connect to Gmail IMAP and select inbox (validates cached UIDs)"""
+    mail = imaplib.IMAP4_SSL("imap.gmail.com")
+    mail.login(email_addr, app_password)
+    mail.select("inbox")
+    
+    # UIDVALIDITY가 바뀌면 저장된 last_uid는 더 이상 의미 없음
+    _, data = mail.response('UIDVALIDITY')
+    uidvalidity = int(data[0]) if data and data[0] else None
+    if state.get("uidvalidity") not in (None, uidvalidity):
+        state["last_uid"] = 0
+    state["uidvalidity"] = uidvalidity
+    return mail
+
+def fetch_new_messages(mail, state, since_hours=24, max_results=10):
+    """Fetch new messages on an open connection and update state"""
+    # Search only emails newer than the last seen UID
+    new_uids = search_new_uids(mail, state.get("last_uid", 0), since_hours)
+    
+    messages = []
+    latest = new_uids[-max_results:]
+    headers = fetch_headers(mail, latest)
+    
+    # Get latest messages (reverse order)
+    for uid in latest[::-1]:
+        msg = headers.get(uid)
+        if msg is None:
+            continue
+        
+        subject = decode_mime_header(msg["Subject"])
+        from_addr = decode_mime_header(msg["From"])
+        date_str = msg["Date"]
+        
+        # Extract sender name/email
+        if "<" in from_addr:
+            sender = from_addr.split("<")[0].strip().strip('"')
+        else:
+            sender = from_addr
+        
+        messages.append({
+            "subject": subject[:100],
+            "from": sender[:50],
+            "date": date_str
+        })
+    
+    # Update state
+    if new_uids:
+        state["last_uid"] = max(int(uid) for uid in new_uids)
+    state["last_check"] = datetime.now().isoformat()
+    return messages
+
 def check_gmail(since_hours=24, max_results=10):
     """Check Gmail for new messages"""
     email_addr, app_password = load_credentials()
@@ -63,65 +170,80 @@ def check_gmail(since_hours=24, max_results=10):
     state = load_state()
     
     try:
-        # Connect to Gmail IMAP
-        mail = imaplib.IMAP4_SSL("imap.gmail.com")
-        mail.login(email_addr, app_password)
-        mail.select("inbox")
-        
-        # Search for recent emails
-        since_date = (datetime.now() - timedelta(hours=since_hours)).strftime("%d-%b-%Y")
-        _, message_numbers = mail.search(None, f'(SINCE "{since_date}")')
-        
-        messages = []
-        msg_nums = message_numbers[0].split()
-        
-        # Get latest messages (reverse order)
-        for num in msg_nums[-max_results:][::-1]:
-            _, msg_data = mail.fetch(num, "(RFC822)")
-            email_body = msg_data[0][1]
-            msg = email.message_from_bytes(email_body)
-            
-            subject = decode_mime_header(msg["Subject"])
-            from_addr = decode_mime_header(msg["From"])
-            date_str = msg["Date"]
-            
-            # Extract sender name/email
-            if "<" in from_addr:
-                sender = from_addr.split("<")[0].strip().strip('"')
-            else:
-                sender = from_addr
-            
-            messages.append({
-                "subject": subject[:100],
-                "from": sender[:50],
-                "date": date_str
-            })
-        
+        mail = connect_gmail(email_addr, app_password, state)
+        messages = fetch_new_messages(mail, state, since_hours, max_results)
         mail.logout()
-        
-        # Update state
-        state["last_check"] = datetime.now().isoformat()
         save_state(state)
-        
         return messages
         
     except Exception as e:
         print(f"❌ Gmail 연결 오류: {e}")
         return []
 
-def main():
-    print("📧 Gmail 새 메일 체크 중...")
-    messages = check_gmail(since_hours=24, max_results=5)
-    
-    if not messages:
-        print("✅ 새 메일 없음 (최근 24시간)")
+def watch_gmail(interval=60, since_hours=24, max_results=10):
+    """Keep one IMAP connection open and poll for new mail"""
+    email_addr, app_password = load_credentials()
+    if not email_addr:
         return
     
+    state = load_state()
+    mail = None
+    print(f"👀 Gmail 감시 시작 ({interval}초 간격)")
+    
+    try:
+        while True:
+            try:
+                if mail is None:
+                    mail = connect_gmail(email_addr, app_password, state)
+                else:
+                    # NOOP으로 연결 유지 + 서버에 새 메일 반영 요청
+                    mail.noop()
+                
+                messages = fetch_new_messages(mail, state, since_hours, max_results)
+                save_state(state)
+                if messages:
+                    print_messages(messages)
+            except (imaplib.IMAP4.abort, OSError) as e:
+                # 연결이 끊기면 버리고 다음 주기에 재접속
+                print(f"⚠️ Gmail 연결 끊김, 재접속 예정: {e}")
+                mail = None
+            except Exception as e:
+                print(f"❌ Gmail 연결 오류: {e}")
+            
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if mail is not None:
+            try: mail.logout()
+            except: pass
+
+def print_messages(messages):
     print(f"\n📬 새 메일 {len(messages)}건:\n")
     for i, msg in enumerate(messages, 1):
         print(f"{i}. **{msg['subject']}**")
         print(f"   From: {msg['from']}")
         print(f"   Date: {msg['date']}\n")
 
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--watch", action="store_true", help="연결 유지하며 계속 감시")
+    parser.add_argument("--interval", type=int, default=60, help="감시 주기 (초)")
+    args = parser.parse_args()
+    
+    if args.watch:
+        watch_gmail(interval=args.interval, since_hours=24, max_results=5)
+        return
+    
+    print("📧 Gmail 새 메일 체크 중...")
+    messages = check_gmail(since_hours=24, max_results=5)
+    
+    if not messages:
+        print("✅ 새 메일 없음")
+        return
+    
+    print_messages(messages)
+
 if __name__ == "__main__":
     main()
@@ -9,21 +9,30 @@ FnGuide 증권사 리포트 자동 수집 스크립트 (OpenClaw Lite Port)
 """
 
 import os
+import re
 import sys
 import json
+import asyncio
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # .env 로드
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 load_dotenv(PROJECT_ROOT / ".env")
 
 try:
-    from playwright.sync_api import sync_playwright
+    from playwright.async_api import async_playwright
 except ImportError:
     print("Playwright 설치 필요: pip install playwright && playwright install chromium")
     sys.exit(1)
@@ -43,17 +52,38 @@ VAULT_PATH = Path(os.getenv("VAULT_PATH", str(Path.home() / "obsidian-vault")))
 DOWNLOAD_DIR = Path.home() / "Downloads" / "fnguide"
 KB_PATH = VAULT_PATH / "03_knowledge-base" / "securities-reports"
 HISTORY_FILE = SCRIPT_DIR / "download_history.json"
+DOWNLOAD_WORKERS = 4  # 동시 다운로드 브라우저 컨텍스트 수
+
+# 텔레그램 API용 keep-alive 세션 (알림마다 TCP/TLS 재연결 방지)
+TELEGRAM_SESSION = requests.Session()
+TELEGRAM_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+TELEGRAM_TIMEOUT = (3.05, 10)  # (connect, read) 초
+
+RPT_ID_RE = re.compile(r'rptId=(\d+)')
+
+# 리포트 테이블 -> [[셀 텍스트...], 제목 링크 href] 리스트
+ROWS_JS = """() => Array.from(document.querySelectorAll('table tbody tr')).map(r => [
+    Array.from(r.querySelectorAll('td')).map(c => c.innerText.trim()),
+    r.querySelectorAll('td')[1]?.querySelector('a')?.getAttribute('href') || ''
+])"""
 
 def load_download_history():
     try:
-        with open(HISTORY_FILE, "r") as f:
-            return set(json.load(f).get("downloaded", []))
+        with open(HISTORY_FILE, "rb") as f:
+            data = f.read()
+        return set((orjson.loads(data) if orjson else json.loads(data)).get("downloaded", []))
     except:
         return set()
 
 def save_download_history(history: set):
-    with open(HISTORY_FILE, "w") as f:
-        json.dump({"downloaded": list(history)}, f, indent=2)
+    # 정렬해서 저장 (diff가 깔끔하도록)
+    payload = {"downloaded": sorted(history)}
+    if orjson:
+        with open(HISTORY_FILE, "wb") as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        with open(HISTORY_FILE, "w") as f:
+            json.dump(payload, f, indent=2)
 
 def is_weekday():
     return datetime.now().weekday() < 5
@@ -63,63 +93,66 @@ def setup_directories(date_str: str):
     (DOWNLOAD_DIR / "txt").mkdir(parents=True, exist_ok=True)
     KB_PATH.mkdir(parents=True, exist_ok=True)
 
-def login_fnguide(page):
-    import time
+async def login_fnguide(page):
     print(f"[INFO] FnGuide 로그인 중...")
-    page.goto(LOGIN_URL)
-    page.wait_for_load_state("networkidle")
-    page.fill('#userId', FNGUIDE_ID)
-    page.fill('#userPw', FNGUIDE_PW)
-    page.click('button.btn.fill-primary.btn-lg')
-    time.sleep(2)
+    await page.goto(LOGIN_URL)
+    await page.wait_for_load_state("networkidle")
+    await page.fill('#userId', FNGUIDE_ID)
+    await page.fill('#userPw', FNGUIDE_PW)
+    await page.click('button.btn.fill-primary.btn-lg')
+    
+    # 로그인 완료(로그아웃 링크) 또는 중복 로그인 팝업이 뜰 때까지 대기
+    try:
+        await page.wait_for_selector('a[href*="Logout"], button:has-text("확인")', timeout=5000)
+    except: pass
     
     # 중복 로그인 팝업 처리
     try:
-        if page.is_visible("text=확인"):
-            page.click("text=확인")
-            time.sleep(2)
+        if await page.is_visible("text=확인"):
+            await page.click("text=확인")
     except: pass
     
-    page.wait_for_load_state("networkidle")
-    if "홈" in page.title():
+    await page.wait_for_load_state("networkidle")
+    title = await page.title()
+    if "홈" in title:
         print(f"[INFO] 로그인 완료")
     else:
-        print(f"[WARN] 로그인 실패 가능성: {page.title()}")
+        print(f"[WARN] 로그인 실패 가능성: {title}")
 
-def get_report_list(page, target_date: str, min_pages: int = 5, max_reports: int = None):
-    import time, re
+async def get_report_list(page, target_date: str, history: set = None, min_pages: int = 5, max_reports: int = None):
     if max_reports is None:
         max_reports = 9999 if is_weekday() else 30
-    history = load_download_history()
+    if history is None:
+        history = load_download_history()
     
     print(f"[INFO] 리포트 목록 조회 중...")
-    page.goto(REPORT_URL)
-    page.wait_for_load_state("networkidle")
-    time.sleep(3)
+    await page.goto(REPORT_URL)
+    await page.wait_for_load_state("networkidle")
+    try:
+        await page.wait_for_selector("table tbody tr", timeout=10000)
+    except Exception as e:
+        print(f"[WARN] 리포트 테이블 로딩 실패: {e}")
     
+    # 행/셀 텍스트와 링크를 한 번의 evaluate로 가져오기 (셀마다 CDP 왕복 방지)
+    rows = await page.evaluate(ROWS_JS)
     reports = []
-    rows = page.query_selector_all("table tbody tr")
     
-    for row in rows:
+    for cells, href in rows:
         try:
-            cells = row.query_selector_all("td")
             if len(cells) < 7: continue
             
-            stock = cells[0].inner_text().strip()
-            title_cell = cells[1]
-            title = title_cell.inner_text().strip()
-            link = title_cell.query_selector("a")
-            href = link.get_attribute("href") if link else ""
+            stock = cells[0]
+            title = cells[1]
             
-            rpt_match = re.search(r'rptId=(\d+)', href)
+            rpt_match = RPT_ID_RE.search(href)
             report_id = rpt_match.group(1) if rpt_match else ""
             
-            company = cells[3].inner_text().strip()
-            analyst = cells[2].inner_text().strip()
-            opinion = cells[4].inner_text().strip()
-            target_price = cells[5].inner_text().strip()
+            company = cells[3]
+            analyst = cells[2]
+            opinion = cells[4]
+            target_price = cells[5]
             
-            try: page_count = int(cells[6].inner_text().strip())
+            try: page_count = int(cells[6])
             except: page_count = 0
 
             if page_count >= min_pages and report_id and report_id not in history:
@@ -137,39 +170,69 @@ def get_report_list(page, target_date: str, min_pages: int = 5, max_reports: int
             
     return reports
 
-def download_report(page, report: dict, save_dir: Path):
-    import time
+async def download_report(page, report: dict, save_dir: Path):
     if not report.get("pdf_url"): return None
     try:
-        page.goto(report["pdf_url"])
-        page.wait_for_load_state("networkidle")
-        time.sleep(3)
+        await page.goto(report["pdf_url"])
+        await page.wait_for_load_state("networkidle")
         
-        # 다운로드 버튼 찾기 (Syncfusion Viewer)
-        btn = page.query_selector(".e-pv-download-document") or page.query_selector("#e-pv-download-document_container")
+        # 다운로드 버튼이 렌더링될 때까지 대기 (Syncfusion Viewer)
+        try:
+            btn = await page.wait_for_selector(".e-pv-download-document, #e-pv-download-document_container", timeout=10000)
+        except:
+            return None
         if not btn: return None
         
-        with page.expect_download(timeout=30000) as download_info:
-            btn.click()
+        async with page.expect_download(timeout=30000) as download_info:
+            await btn.click()
             
-        download = download_info.value
+        download = await download_info.value
         filepath = save_dir / download.suggested_filename
-        download.save_as(filepath)
+        await download.save_as(filepath)
         print(f"[OK] 다운로드: {filepath.name}")
-        time.sleep(2)
         return filepath
     except Exception as e:
         print(f"[ERROR] 다운로드 실패: {e}")
         return None
 
+async def download_reports(browser, storage_state: dict, reports: list, save_dir: Path):
+    """로그인 세션을 공유하는 컨텍스트 여러 개로 리포트 병렬 다운로드 -> 리포트 순서대로 PDF 경로"""
+    queue = asyncio.Queue()
+    for i, r in enumerate(reports):
+        queue.put_nowait((i, r))
+    results = [None] * len(reports)
+    
+    async def worker():
+        context = await browser.new_context(storage_state=storage_state, accept_downloads=True)
+        try:
+            page = await context.new_page()
+            while True:
+                try:
+                    i, r = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[i] = await download_report(page, r, save_dir)
+        finally:
+            await context.close()
+    
+    workers = min(DOWNLOAD_WORKERS, len(reports))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results
+
 def convert_pdf_to_text(pdf_path: Path):
     txt_path = DOWNLOAD_DIR / "txt" / f"{pdf_path.stem}.txt"
     try:
-        subprocess.run(["pdftotext", str(pdf_path), str(txt_path)], check=True, capture_output=True)
+        subprocess.run(["pdftotext", "-nopgbrk", str(pdf_path), str(txt_path)], check=True, capture_output=True)
         return txt_path
     except:
         return None
 
+def convert_pdfs_to_text(pdf_paths: list):
+    """pdftotext를 CPU 수만큼 동시에 실행 (프로세스 대기 중에는 GIL 해제)"""
+    if not pdf_paths: return []
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        return list(pool.map(convert_pdf_to_text, pdf_paths))
+
 def save_to_kb(reports: list, date_str: str):
     dt = datetime.strptime(date_str, "%Y-%m-%d")
     filename = f"증권사리포트_요약_{dt.year}W{dt.isocalendar()[1]:02d}.md"
@@ -188,10 +251,48 @@ def send_telegram(message: str):
     if not TELEGRAM_BOT_TOKEN or not ALLOWED_USER_ID: return
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     try:
-        requests.post(url, json={"chat_id": ALLOWED_USER_ID, "text": message, "parse_mode": "Markdown"})
+        TELEGRAM_SESSION.post(url, json={"chat_id": ALLOWED_USER_ID, "text": message, "parse_mode": "Markdown"}, timeout=TELEGRAM_TIMEOUT)
     except Exception as e:
         print(f"[WARN] 텔레그램 전송 실패: {e}")
 
+async def scrape(target_date: str, dry_run: bool = False):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        page = await context.new_page()
+        
+        # 히스토리는 한 번만 읽어 목록 필터링/갱신에 같이 사용
+        history = load_download_history()
+        
+        await login_fnguide(page)
+        reports = await get_report_list(page, target_date, history)
+        
+        if not reports:
+            print("[INFO] 리포트 없음")
+            return
+
+        if dry_run: return
+
+        # 로그인 쿠키를 다운로드 워커 컨텍스트들에 넘겨 세션 공유
+        storage_state = await context.storage_state()
+        pdfs = await download_reports(browser, storage_state, reports, DOWNLOAD_DIR / target_date)
+        
+        downloaded = [r for r, pdf in zip(reports, pdfs) if pdf]
+        convert_pdfs_to_text([pdf for pdf in pdfs if pdf])
+        history_changed = False
+        
+        for r in downloaded:
+            if r.get("id") and r["id"] not in history:
+                history.add(r["id"])
+                history_changed = True
+        
+        if history_changed:
+            save_download_history(history)
+        if downloaded:
+            kb_path = save_to_kb(downloaded, target_date)
+            msg = f"📊 *FnGuide 리포트 수집 완료*\n\n날짜: `{target_date}`\n수집: {len(downloaded)}개\n저장: `{kb_path.name}`"
+            send_telegram(msg)
+
 def main():
     import argparse
     parser = argparse.ArgumentParser()
@@ -207,34 +308,7 @@ def main():
 
     setup_directories(target_date)
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
-        login_fnguide(page)
-        reports = get_report_list(page, target_date)
-        
-        if not reports:
-            print("[INFO] 리포트 없음")
-            return
-
-        if args.dry_run: return
-
-        downloaded = []
-        history = load_download_history()
-        
-        for r in reports:
-            pdf = download_report(page, r, DOWNLOAD_DIR / target_date)
-            if pdf:
-                convert_pdf_to_text(pdf)
-                downloaded.append(r)
-                if r.get("id"): history.add(r["id"])
-        
-        save_download_history(history)
-        if downloaded:
-            kb_path = save_to_kb(downloaded, target_date)
-            msg = f"📊 *FnGuide 리포트 수집 완료*\n\n날짜: `{target_date}`\n수집: {len(downloaded)}개\n저장: `{kb_path.name}`"
-            send_telegram(msg)
+    asyncio.run(scrape(target_date, args.dry_run))
 
 if __name__ == "__main__":
     main()
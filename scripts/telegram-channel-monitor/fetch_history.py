@@ -12,6 +12,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 from telethon import TelegramClient
 
+from keyword_matcher import KeywordMatcher
+
 load_dotenv()
 
 API_ID = os.getenv('TELEGRAM_API_ID')
@@ -19,6 +21,9 @@ API_HASH = os.getenv('TELEGRAM_API_HASH')
 
 CONFIG_PATH = Path(__file__).parent / 'config.json'
 
+# 채널 동시 조회 수 (FLOOD_WAIT 방지)
+MAX_CONCURRENT_CHANNELS = 4
+
 def load_config():
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
@@ -29,36 +34,45 @@ async def fetch_history(days=14, limit=1000):
     config = load_config()
     channels = [ch['url'] for ch in config['channels'] if ch.get('enabled', True)]
     keywords = [kw.lower() for kw in config['keywords']['watchlist']]
+    matcher = KeywordMatcher({'watchlist': keywords})
     
     client = TelegramClient('monitor_session', API_ID, API_HASH)
     await client.start()
     
     cutoff_date = datetime.now() - timedelta(days=days)
-    matched_messages = []
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHANNELS)
     
-    for channel_url in channels:
-        print(f"\n📢 채널: {channel_url}")
-        print(f"   최근 {days}일간 메시지 검색 중...")
-        
-        try:
-            channel = await client.get_entity(channel_url)
+    async def scan(channel_url):
+        """채널 하나의 최근 메시지에서 키워드 매칭"""
+        matched = []
+        async with semaphore:
+            print(f"\n📢 채널: {channel_url}")
+            print(f"   최근 {days}일간 메시지 검색 중...")
             
-            async for message in client.iter_messages(channel, limit=limit):
-                if message.date.replace(tzinfo=None) < cutoff_date:
-                    break
+            try:
+                channel = await client.get_entity(channel_url)
                 
-                text = (message.message or "").lower()
-                matched_kw = [kw for kw in keywords if kw in text]
-                
-                if matched_kw:
-                    matched_messages.append({
-                        'date': message.date.strftime('%Y-%m-%d %H:%M'),
-                        'text': message.message[:500],
-                        'keywords': matched_kw
-                    })
+                async for message in client.iter_messages(channel, limit=limit):
+                    if message.date.replace(tzinfo=None) < cutoff_date:
+                        break
+                    
+                    matched_kw = matcher.match(message.message or "")['watchlist']
+                    
+                    if matched_kw:
+                        matched.append({
+                            'date': message.date.strftime('%Y-%m-%d %H:%M'),
+                            'text': message.message[:500],
+                            'keywords': matched_kw
+                        })
+            
+            except Exception as e:
+                print(f"   ❌ 에러 ({channel_url}): {e}")
         
-        except Exception as e:
-            print(f"   ❌ 에러: {e}")
+        return matched
+    
+    # 채널별 조회는 서로 독립적이므로 하나의 클라이언트로 동시에 실행
+    results = await asyncio.gather(*(scan(url) for url in channels))
+    matched_messages = [msg for result in results for msg in result]
     
     await client.disconnect()
     
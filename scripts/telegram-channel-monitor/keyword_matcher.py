@@ -0,0 +1,84 @@
+"""
+키워드 매칭 (monitor.py / fetch_history.py 공용)
+- pyahocorasick 설치 시 Aho-Corasick 오토마톤으로 단일 패스 스캔
+- 미설치 시 미리 컴파일한 정규식 alternation으로 단일 패스 스캔
+"""
+
+import re
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """키워드 그룹(alert/track 등)을 한 번에 스캔 - 설정 로드 시 1회 생성"""
+
+    def __init__(self, groups: dict, case_sensitive: bool = False):
+        self.groups = {kind: list(keywords) for kind, keywords in groups.items()}
+        self.case_sensitive = case_sensitive
+        self._automaton = None
+        self._pattern = None
+
+        # needle -> [(kind, 원본 키워드), ...] (같은 needle이 여러 그룹에 있을 수 있음)
+        # needle은 생성 시 한 번만 소문자화
+        self._needles = {}
+        for kind, keywords in self.groups.items():
+            for keyword in keywords:
+                needle = keyword if case_sensitive else keyword.lower()
+                if needle:
+                    self._needles.setdefault(needle, []).append((kind, keyword))
+
+        # 대소문자 구분 없는 모드라도 needle에 대소문자 있는 문자가 없으면
+        # (한글/숫자 키워드만 있는 경우) 메시지 텍스트 소문자화가 필요 없음
+        self._lower_text = not case_sensitive and any(n.upper() != n for n in self._needles)
+
+        if not self._needles:
+            return
+        if ahocorasick is not None:
+            self._automaton = self._build_automaton()
+        else:
+            self._pattern, self._contained = self._build_pattern()
+
+    def _build_automaton(self):
+        automaton = ahocorasick.Automaton()
+        for needle in self._needles:
+            automaton.add_word(needle, needle)
+        automaton.make_automaton()
+        return automaton
+
+    def _build_pattern(self):
+        # lookahead로 모든 위치에서 가장 긴 키워드를 잡고,
+        # 그 안에 포함된 짧은 키워드는 _contained로 보충 (겹치는 키워드 누락 방지)
+        needles = sorted(self._needles, key=len, reverse=True)
+        pattern = re.compile('(?=(' + '|'.join(re.escape(n) for n in needles) + '))')
+        contained = {n: [m for m in needles if m != n and m in n] for n in needles}
+        return pattern, contained
+
+    def _scan(self, check_text: str):
+        """텍스트에 등장한 needle을 등장 순서대로 반환"""
+        if self._automaton is not None:
+            for _, needle in self._automaton.iter(check_text):
+                yield needle
+        elif self._pattern is not None:
+            for m in self._pattern.finditer(check_text):
+                needle = m.group(1)
+                yield needle
+                yield from self._contained[needle]
+
+    def match(self, text: str) -> dict:
+        """그룹별 매칭 키워드 리스트 반환 - {kind: [keyword, ...]}"""
+        matched = {kind: [] for kind in self.groups}
+        if not text:
+            return matched
+
+        seen = set()
+        check_text = text.lower() if self._lower_text else text
+        for needle in self._scan(check_text):
+            if needle in seen:
+                continue
+            seen.add(needle)
+            for kind, keyword in self._needles[needle]:
+                matched[kind].append(keyword)
+        return matched
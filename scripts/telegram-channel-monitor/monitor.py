@@ -8,15 +8,24 @@
 
 import os
 import json
+import atexit
 import asyncio
 import logging
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 from dotenv import load_dotenv
-from telethon import TelegramClient, events
+from telethon import TelegramClient, events, utils
 import aiohttp
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from keyword_matcher import KeywordMatcher
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -37,6 +46,12 @@ PHONE = os.getenv('TELEGRAM_PHONE')
 BOT_TOKEN = os.getenv('TARGET_BOT_TOKEN')
 CHAT_ID = os.getenv('TARGET_CHAT_ID')
 
+# 봇 API 호출용 공유 세션 (알림마다 TCP/TLS 재연결 방지)
+_session: Optional[aiohttp.ClientSession] = None
+
+# track 로그 파일 핸들 (프로세스 동안 한 번만 열기)
+_track_fp = None
+
 # 설정 로드
 CONFIG_PATH = Path(__file__).parent / 'config.json'
 
@@ -44,20 +59,20 @@ def load_config():
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def check_keywords(text: str, keywords: list, case_sensitive: bool = False) -> list:
-    """키워드 매칭 확인 - 매칭된 키워드 리스트 반환"""
-    if not text:
-        return []
-    
-    check_text = text if case_sensitive else text.lower()
-    matched = []
-    
-    for keyword in keywords:
-        check_keyword = keyword if case_sensitive else keyword.lower()
-        if check_keyword in check_text:
-            matched.append(keyword)
-    
-    return matched
+def get_session() -> aiohttp.ClientSession:
+    """keep-alive 공유 세션 반환 (없으면 생성)"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
 
 async def send_to_bot(message: str):
     """톨라니 봇으로 메시지 전송"""
@@ -74,24 +89,36 @@ async def send_to_bot(message: str):
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                if resp.status == 200:
-                    logger.info(f"Message forwarded successfully")
-                    return True
-                else:
-                    error = await resp.text()
-                    logger.error(f"Failed to forward: {error}")
-                    return False
+        async with get_session().post(url, json=payload) as resp:
+            if resp.status == 200:
+                logger.info(f"Message forwarded successfully")
+                return True
+            else:
+                error = await resp.text()
+                logger.error(f"Failed to forward: {error}")
+                return False
     except Exception as e:
         logger.error(f"Error sending message: {e}")
         return False
 
+def open_track_file(track_file: Path):
+    """track 로그 파일을 append 모드로 한 번 열어 재사용"""
+    global _track_fp
+    if _track_fp is None:
+        _track_fp = open(track_file, 'a', encoding='utf-8', buffering=1 << 16)
+        atexit.register(_track_fp.close)
+    return _track_fp
+
 def log_to_track_file(track_file: Path, data: dict):
     """track 키워드 매칭 메시지를 JSONL 파일에 저장"""
     try:
-        with open(track_file, 'a', encoding='utf-8') as f:
+        f = open_track_file(track_file)
+        if orjson:
+            f.write(orjson.dumps(data).decode() + '\n')
+        else:
             f.write(json.dumps(data, ensure_ascii=False) + '\n')
+        # 다른 프로세스가 바로 읽을 수 있도록 flush (open/close는 생략)
+        f.flush()
         logger.info(f"Logged to track file: {data.get('matched_track', [])}")
     except Exception as e:
         logger.error(f"Error logging to track file: {e}")
@@ -111,6 +138,7 @@ async def main():
     alert_keywords = config['keywords'].get('alert', [])
     track_keywords = config['keywords'].get('track', [])
     case_sensitive = config['keywords'].get('case_sensitive', False)
+    matcher = KeywordMatcher({'alert': alert_keywords, 'track': track_keywords}, case_sensitive)
     
     # 포워딩 설정
     alert_to_telegram = config['forward'].get('alert_to_telegram', True)
@@ -120,6 +148,9 @@ async def main():
     # 트랙 로그 파일
     track_file = Path(__file__).parent / config.get('log', {}).get('track_file', 'track_log.jsonl')
     
+    if track_to_log:
+        open_track_file(track_file)
+    
     logger.info(f"Monitoring channels: {channels}")
     logger.info(f"Alert keywords (텔레그램 알림): {alert_keywords}")
     logger.info(f"Track keywords (로그 저장): {len(track_keywords)}개")
@@ -127,23 +158,29 @@ async def main():
     # Telethon 클라이언트 생성
     client = TelegramClient('monitor_session', API_ID, API_HASH)
     
+    # 채널 ID -> 채널명 캐시 (시작 시 한 번 조회, 없으면 그때 조회)
+    chat_titles = {}
+    
     @client.on(events.NewMessage(chats=channels))
     async def handler(event):
         """새 메시지 핸들러"""
         try:
-            message_text = event.message.message or ""
+            message_text = event.raw_text or ""
             
-            # 키워드 매칭 확인
-            matched_alert = check_keywords(message_text, alert_keywords, case_sensitive)
-            matched_track = check_keywords(message_text, track_keywords, case_sensitive)
+            # 키워드 매칭 확인 (alert/track 한 번에 스캔)
+            matched = matcher.match(message_text)
+            matched_alert = matched['alert']
+            matched_track = matched['track']
             
             # 매칭 없으면 무시
             if not matched_alert and not matched_track:
                 return
             
             # 채널 정보
-            chat = await event.get_chat()
-            channel_name = getattr(chat, 'title', 'Unknown')
+            channel_name = chat_titles.get(event.chat_id)
+            if channel_name is None:
+                chat = await event.get_chat()
+                channel_name = chat_titles[event.chat_id] = getattr(chat, 'title', 'Unknown')
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # Alert 키워드 매칭 → 텔레그램 알림
@@ -176,11 +213,21 @@ async def main():
     
     # 클라이언트 시작
     await client.start(phone=PHONE)
+    
+    for url in channels:
+        try:
+            entity = await client.get_entity(url)
+            chat_titles[utils.get_peer_id(entity)] = getattr(entity, 'title', 'Unknown')
+        except Exception as e:
+            logger.warning(f"Failed to resolve channel {url}: {e}")
     logger.info("✅ Channel monitor started!")
     logger.info("Listening for new messages...")
     
     # 무한 대기
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await close_session()
 
 if __name__ == '__main__':
     asyncio.run(main())
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import os
 import re
+import pandas as pd
 import yfinance as yf
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -16,6 +18,11 @@ TRACKER_FILE = VAULT_PATH / "11_개인투자/투자아이디어_트래커.md"
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 ALLOWED_USER_ID = os.getenv("ALLOWED_USER_ID")
 
+# 텔레그램 API용 keep-alive 세션 (알림마다 TCP/TLS 재연결 방지)
+TELEGRAM_SESSION = requests.Session()
+TELEGRAM_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+TELEGRAM_TIMEOUT = (3.05, 10)  # (connect, read) 초
+
 # 종목명 -> 야후 파이낸스 티커 매핑 (KOSPI: .KS, KOSDAQ: .KQ)
 TICKER_MAP = {
     "삼성전자": "005930.KS",
@@ -33,41 +40,53 @@ TICKER_MAP = {
     "삼성전기": "009150.KS"
 }
 
-def get_current_price(ticker):
+# 종목명 alternation (긴 이름 우선) - 행마다 한 번의 검색으로 종목 찾기
+TICKER_RE = re.compile('|'.join(re.escape(name) for name in sorted(TICKER_MAP, key=len, reverse=True)))
+# 마크다운 테이블 행 ('|' 포함 라인)
+TABLE_ROW_RE = re.compile(r'^[^\n]*\|[^\n]*$', re.MULTILINE)
+NON_DIGIT_RE = re.compile(r'[^0-9]')
+
+def get_current_prices(ticker_map):
+    """전 종목 현재가를 한 번의 배치 요청으로 가져오기 -> {종목명: 가격}"""
     try:
-        stock = yf.Ticker(ticker)
-        # fast_info를 사용하여 빠르게 가져오기
-        price = stock.fast_info['last_price']
-        return int(price)
+        close = yf.download(list(ticker_map.values()), period="1d", progress=False, threads=True)["Close"]
+        last = close.ffill().iloc[-1]
     except:
-        return None
+        return {}
+    
+    prices = {}
+    for name, ticker in ticker_map.items():
+        price = last.get(ticker)
+        if price is not None and not pd.isna(price):
+            prices[name] = int(price)
+    return prices
 
-def update_table_row(line, name, price):
-    # 마크다운 테이블 행 업데이트 로직
+def update_table_row(line, price):
+    """현재가/vs트리거 컬럼만 교체 -> (새 행, 트리거, 괴리율%) / 실패 시 None"""
     # | **종목** | 등급 | 현재가 | 목표가 | 트리거 | vs트리거 | 비고 |
-    parts = [p.strip() for p in line.split('|')]
-    if len(parts) < 6: return line
+    cells = line.split('|')
+    if len(cells) < 6: return None
     
+    # 트리거 가격 가져오기 (5번째 컬럼)
     try:
-        # 현재가 업데이트 (3번째 컬럼)
-        parts[3] = f"{price:,}"
-        
-        # 트리거 가격 가져오기 (5번째 컬럼)
-        trigger_str = parts[5].replace(',', '')
-        trigger_price = int(re.sub(r'[^0-9]', '', trigger_str))
-        
-        # vs트리거 계산
-        diff_pct = ((price / trigger_price) - 1) * 100
-        parts[6] = f"**{diff_pct:+.0f}%**" if abs(diff_pct) < 10 else f"{diff_pct:+.0f}%"
-        
-        return " | ".join(parts[1:-1]).join(['| ', ' |'])
-    except:
-        return line
+        trigger_val = int(NON_DIGIT_RE.sub('', cells[5]))
+        diff_pct = int(((price / trigger_val) - 1) * 100)
+    except (ValueError, ZeroDivisionError):
+        return None
+    
+    cells[3] = f" {price:,} "
+    # vs트리거 업데이트 (마지막 '|' 뒤 빈 조각이 아닌 실제 컬럼일 때만)
+    if len(cells) > 7:
+        cells[6] = f" **{diff_pct:+.0f}%** "
+    return '|'.join(cells), trigger_val, diff_pct
 
 def send_telegram(message):
     if not TELEGRAM_BOT_TOKEN or not ALLOWED_USER_ID: return
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    requests.post(url, json={"chat_id": ALLOWED_USER_ID, "text": message, "parse_mode": "Markdown"})
+    try:
+        TELEGRAM_SESSION.post(url, json={"chat_id": ALLOWED_USER_ID, "text": message, "parse_mode": "Markdown"}, timeout=TELEGRAM_TIMEOUT)
+    except Exception as e:
+        print(f"[WARN] 텔레그램 전송 실패: {e}")
 
 def main():
     if not TRACKER_FILE.exists():
@@ -75,52 +94,39 @@ def main():
         return
 
     content = TRACKER_FILE.read_text(encoding="utf-8")
-    lines = content.splitlines()
-    new_lines = []
     updated_count = 0
     alerts = []
+    prices = get_current_prices(TICKER_MAP)
 
-    for line in lines:
-        matched = False
-        for name, ticker in TICKER_MAP.items():
-            # 종목명이 포함된 테이블 행 찾기 (볼드체 포함 고려)
-            if f"**{name}**" in line or (name in line and '|' in line):
-                price = get_current_price(ticker)
-                if price:
-                    # 정규식으로 현재가 컬럼(숫자 부분) 교체 시도
-                    # 구조: | 종목 | 등급 | 현재가 | 목표가 | 트리거 | ...
-                    parts = [p.strip() for p in line.split('|')]
-                    if len(parts) >= 6:
-                        old_price_str = parts[3]
-                        parts[3] = f"{price:,}"
-                        
-                        # vs트리거/조정트리거 계산
-                        trigger_idx = 5
-                        trigger_str = parts[trigger_idx].replace(',', '')
-                        try:
-                            trigger_val = int(re.sub(r'[^0-9]', '', trigger_str))
-                            diff_pct = int(((price / trigger_val) - 1) * 100)
-                            
-                            # vs트리거 업데이트
-                            if len(parts) > 6:
-                                parts[6] = f"**{diff_pct:+.0f}%**"
-                            
-                            line = " | ".join(parts).strip()
-                            if not line.startswith('|'): line = "| " + line
-                            if not line.endswith('|'): line = line + " |"
-                            
-                            # 알림 조건 (트리거 도달 등)
-                            if diff_pct <= 0:
-                                alerts.append(f"🎯 *{name}* 트리거 도달! (현재가: {price:,} / 트리거: {trigger_val:,})")
-                            
-                            matched = True
-                            updated_count += 1
-                        except: pass
+    def replace_row(m):
+        nonlocal updated_count
+        line = m.group(0)
+        
+        # 종목명이 포함된 테이블 행 찾기 (볼드체 포함 고려)
+        ticker_match = TICKER_RE.search(line)
+        if ticker_match is None:
+            return line
         
-        new_lines.append(line)
+        name = ticker_match.group(0)
+        price = prices.get(name)
+        if not price:
+            return line
+        
+        updated = update_table_row(line, price)
+        if updated is None:
+            return line
+        
+        new_line, trigger_val, diff_pct = updated
+        # 알림 조건 (트리거 도달 등)
+        if diff_pct <= 0:
+            alerts.append(f"🎯 *{name}* 트리거 도달! (현재가: {price:,} / 트리거: {trigger_val:,})")
+        updated_count += 1
+        return new_line
+
+    new_content = TABLE_ROW_RE.sub(replace_row, content)
 
     if updated_count > 0:
-        TRACKER_FILE.write_text("\n".join(new_lines), encoding="utf-8")
+        TRACKER_FILE.write_text(new_content, encoding="utf-8")
         msg = f"📈 *투자 트래커 업데이트 완료*\n- 업데이트 종목: {updated_count}개"
         if alerts:
             msg += "\n\n" + "\n".join(alerts)